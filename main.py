@@ -1,230 +1,462 @@
+import asyncio
 import berserk
+import datetime
 import chess
-import time
 import random
 import os
 import chess.engine
-import re
+import chess.polyglot
+import contextlib
+import logging
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask
 
 # === CONFIGURATION ===
 STOCKFISH_PATH = "./stockfish"  # our downloaded binary
 token = os.environ["Lichess_token"]  # Lichess token stored as secret
+ENGINE_HASH_MB = int(os.environ.get("ENGINE_HASH_MB", 64))  # per-game transposition table size; fits Render's free 512 MB
+ENGINE_THREADS = 1  # one Stockfish process per game, so one search thread each
+EVAL_CACHE_SIZE = 65536  # positions kept in the shared evaluation cache
+CACHE_MAX_HALFMOVES = 60  # past this, 50-move draws can colour engine scores
+STREAM_THREADS = 64  # blocking Lichess streams; each open game holds one for its whole length
+IO_THREADS = 8  # short blocking Lichess calls (moves, challenges)
+RECONNECT_DELAY = 5  # seconds before reopening a dropped incoming-events stream
+BOOK_PATH = os.environ.get("BOOK_PATH", "./book.bin")  # optional polyglot opening book
+BOOK_MAX_FULLMOVE = 12  # only consult the book before this move number
+SCREEN_NODES = 200_000  # node cap for root eval and MultiPV screen
+VERIFY_NODES = 1_500_000  # node cap per deep mate verification
+MIN_NODES = 20_000  # floor so low clocks still get a usable search
+MOVES_TO_GO = 40  # assumed remaining moves when splitting the clock
+DEFAULT_NPS = 500_000  # used if the engine does not report nodes per second
 
 # === SETUP ===
 session = berserk.TokenSession(token)
 client = berserk.Client(session=session)
-engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
+logger = logging.getLogger(__name__)
+
+# Streams and REST calls get separate pools so long-lived stream reads can
+# never starve make_move/accept_challenge.
+stream_executor = ThreadPoolExecutor(max_workers=STREAM_THREADS)
+io_executor = ThreadPoolExecutor(max_workers=IO_THREADS)
+book = chess.polyglot.open_reader(BOOK_PATH) if os.path.exists(BOOK_PATH) else None
+
+# Evaluations keyed by (search kind, zobrist hash, depth), shared by every game
+# in this process so known positions (openings especially) skip Stockfish.
+# The hash ignores move history while the engine search does not, so positions
+# whose score may depend on repetitions or the 50-move rule are not cached.
+_eval_cache = OrderedDict()
 
 # === ENGINE HELPERS ===
+def _cacheable(board):
+    return board.halfmove_clock < CACHE_MAX_HALFMOVES and not board.is_repetition(2)
+
+
+def _cache_get(key):
+    value = _eval_cache.get(key)
+    if value is not None:
+        _eval_cache.move_to_end(key)
+    return value
+
+
+def _cache_put(key, value):
+    _eval_cache[key] = value
+    _eval_cache.move_to_end(key)
+    if len(_eval_cache) > EVAL_CACHE_SIZE:
+        _eval_cache.popitem(last=False)
+
+
+async def _run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(io_executor, func, *args)
+
+
+async def _iterate_blocking(iterator):
+    # berserk streams are blocking generators; pull each item on the stream
+    # pool so waiting on Lichess never stalls the event loop.
+    loop = asyncio.get_running_loop()
+    done = object()
+    while True:
+        item = await loop.run_in_executor(stream_executor, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def _latest_game_events(game_id, game_stream):
+    # Read the game stream in the background and, whenever the handler is
+    # ready for more, collapse the queued gameFull/gameState events into the
+    # newest one so we never think about a position that is already gone.
+    queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for event in _iterate_blocking(game_stream):
+                queue.put_nowait(event)
+        except Exception as e:
+            logger.warning("⚠️ Game stream failed: %s", e)
+        finally:
+            queue.put_nowait(done)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        finished = False
+        while not finished:
+            pending = [await queue.get()]
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+
+            latest_state = None
+            skipped = 0
+            for event in pending:
+                if event is done:
+                    finished = True
+                elif event['type'] in ['gameFull', 'gameState']:
+                    skipped += latest_state is not None
+                    latest_state = event
+                else:
+                    yield event
+            if skipped:
+                logger.debug("[%s] Skipped %s stale game states.", game_id, skipped)
+            if latest_state is not None:
+                yield latest_state
+    finally:
+        pump_task.cancel()
+
+
 def _get_cp_and_mate_from_info(info, perspective_color):
     score = info.get("score")
-    if score is None:
+    if not isinstance(score, chess.engine.PovScore):
         return None, None
 
-    pov_candidates = []
-    try:
-        pov_candidates.append(score.pov(perspective_color))
-    except Exception:
-        pass
-    try:
-        pov_candidates.append(score.white() if perspective_color == chess.WHITE else score.black())
-    except Exception:
-        pass
-    try:
-        pov_candidates.append(score.relative)
-    except Exception:
-        pass
+    pov = score.pov(perspective_color)
+    if pov.is_mate():
+        return None, pov.mate()
+    return pov.score(mate_score=100000), None
+
+
+def _clock_ms(value):
+    # berserk hands clocks over as ints, timedeltas or (older releases)
+    # datetimes counted from the epoch.
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds() * 1000
+    if isinstance(value, datetime.datetime):
+        return value.timestamp() * 1000
+    return value
 
-    for pov in pov_candidates:
-        if pov is None:
-            continue
-        try:
-            if getattr(pov, "is_mate", lambda: False)():
-                try:
-                    return None, pov.mate()
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        try:
-            if getattr(pov, "score", None) is not None:
-                cp = pov.score(mate_score=100000)
-                return cp, None
-        except Exception:
-            pass
 
+async def _measure_nps(engine):
     try:
-        s = str(score)
-        mate_match = re.search(r"#\s*([+-]?\d+)", s)
-        if mate_match:
-            m = int(mate_match.group(1))
-            return None, m
-        num_match = re.search(r"([-+]?\d+)", s)
-        if num_match:
-            return int(num_match.group(1)), None
-    except Exception:
-        pass
-
-    return None, None
-
-
-def pick_worst_survivable_move(board: chess.Board,
-                               engine,
-                               eval_depth: int = 6,
-                               max_mate_depth: int = 16,
-                               cp_cap_one_move: int = 550,
-                               cp_cap_total: int = -925):
+        info = await engine.analyse(chess.Board(), chess.engine.Limit(time=0.2))
+        return info.get("nps") or DEFAULT_NPS
+    except Exception as e:
+        logger.warning("⚠️ Engine NPS calibration failed: %s", e)
+        return DEFAULT_NPS
+
+
+def _node_budget(clock_ms, nps, verify_count=3):
+    # Spend about 1/MOVES_TO_GO of the remaining clock on this move: a quarter
+    # each on the root eval and screen, half on the deep verifications, whose
+    # total spend is tracked against verify_budget.
+    if clock_ms is None:
+        return SCREEN_NODES, VERIFY_NODES, VERIFY_NODES * verify_count
+    budget = nps * clock_ms / MOVES_TO_GO / 1000
+    screen_nodes = max(MIN_NODES, min(SCREEN_NODES, int(budget / 4)))
+    verify_budget = max(MIN_NODES, min(VERIFY_NODES * verify_count, int(budget / 2)))
+    verify_nodes = max(MIN_NODES, min(VERIFY_NODES, verify_budget // verify_count))
+    return screen_nodes, verify_nodes, verify_budget
+
+
+async def _analyse_with_early_exit(engine, board, limit, early_exit_depth, perspective_color, game=None):
+    # Stream Stockfish's iterative deepening and stop as soon as a mate shows
+    # up or the search has reached early_exit_depth without one.
+    with await engine.analysis(board, limit, game=game) as analysis:
+        async for info in analysis:
+            if "score" not in info:
+                continue
+            if info["score"].pov(perspective_color).is_mate() or info.get("depth", 0) >= early_exit_depth:
+                break
+        return analysis.info
+
+
+async def pick_worst_survivable_move(board: chess.Board,
+                                     engine,
+                                     eval_depth: int = 6,
+                                     screen_depth: int = 8,
+                                     max_mate_depth: int = 16,
+                                     early_exit_depth: int = 12,
+                                     verify_count: int = 3,
+                                     cp_cap_one_move: int = 550,
+                                     cp_cap_total: int = -925,
+                                     screen_nodes: int = SCREEN_NODES,
+                                     verify_nodes: int = VERIFY_NODES,
+                                     verify_budget: int = None,
+                                     game=None):
     bot_color = board.turn
     legal_moves = list(board.legal_moves)
     if not legal_moves:
         return None
 
-    if board.is_check():
-        print("🛡️ In check — playing best move.")
+    if book is not None and board.fullmove_number < BOOK_MAX_FULLMOVE:
+        entries = list(book.find_all(board))
+        if entries:
+            worst = min(entries, key=lambda e: e.weight).move
+            logger.debug("📖 Least-played book move: %s", worst)
+            return worst
+
+    zkey = chess.polyglot.zobrist_hash(board)
+    use_cache = _cacheable(board)
+
+    cur_cp, best_root_move = 0, None
+    cached = _cache_get(("eval", zkey, eval_depth)) if use_cache else None
+    if cached is not None:
+        cur_cp, best_root_move = cached
+    else:
         try:
-            best_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth), multipv=1)
-            return best_info[0]["pv"][0]
+            cur_info = await engine.analyse(board, chess.engine.Limit(depth=eval_depth, nodes=screen_nodes), game=game)
+            cur_cp, cur_mate = _get_cp_and_mate_from_info(cur_info, bot_color)
+            if cur_cp is None:
+                cur_cp = 0
+            if cur_info.get("pv"):
+                best_root_move = cur_info["pv"][0]
+            # Node caps can cut a search short; only cache ones that got deep enough.
+            if use_cache and cur_info.get("depth", 0) >= eval_depth:
+                _cache_put(("eval", zkey, eval_depth), (cur_cp, best_root_move))
         except Exception as e:
-            print("⚠️ Engine failed in check:", e)
-            return random.choice(legal_moves)
+            logger.warning("⚠️ Engine error obtaining eval: %s", e)
 
-    try:
-        cur_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth))
-        cur_cp, cur_mate = _get_cp_and_mate_from_info(cur_info, bot_color)
-        if cur_cp is None:
-            cur_cp = 0
-    except Exception as e:
-        print("⚠️ Engine error obtaining eval:", e)
-        cur_cp = 0
+    if board.is_check():
+        logger.debug("🛡️ In check — playing best move.")
+        return best_root_move or random.choice(legal_moves)
 
-    move_candidates = []
+    screened = []
     mate_losses = 0
-    winning_mate_move = None
     total = len(legal_moves)
 
-    for move in legal_moves:
-        temp = board.copy()
-        temp.push(move)
+    # Phase 1: cheap MultiPV screen of every root move.
+    root_lines = _cache_get(("screen", zkey, screen_depth)) if use_cache else None
+    if root_lines is None:
+        try:
+            root_infos = await engine.analyse(board, chess.engine.Limit(depth=screen_depth, nodes=screen_nodes), multipv=total, game=game)
+            root_lines = [(info["pv"][0], *_get_cp_and_mate_from_info(info, bot_color))
+                          for info in root_infos if info.get("pv")]
+            if root_lines and use_cache and min(info.get("depth", 0) for info in root_infos) >= screen_depth:
+                _cache_put(("screen", zkey, screen_depth), root_lines)
+        except Exception as e:
+            logger.warning("⚠️ Engine screen failed: %s", e)
+            root_lines = []
+
+    for move, cp_after, mate_after in root_lines:
+        if mate_after is not None:
+            if mate_after > 0:
+                logger.debug("🏆 Mate found for us with %s in %s", move, mate_after)
+                return move
+            mate_losses += 1
+            logger.debug("⛔ Skipping %s — mate in %s", move, -mate_after)
+            continue
+
+        if cp_after is None:
+            logger.debug("⚠️ Could not obtain CP for %s — skipping", move)
+            continue
+
+        drop = cur_cp - cp_after
+        if drop > cp_cap_one_move:
+            logger.debug("🚫 Skipping %s — drop %s > %s", move, drop, cp_cap_one_move)
+            continue
+
+        screened.append((cp_after, move))
+
+    if mate_losses / total > 0.25:
+        logger.debug("⚠️ %s/%s moves mate us — survival mode.", mate_losses, total)
+        return best_root_move or random.choice(legal_moves)
+
+    if cur_cp < -1250:
+        logger.debug("🚨 Eval %s < -1500 — survival mode.", cur_cp)
+        return best_root_move or random.choice(legal_moves)
+
+    # Phase 2: search the worst screened moves deeper, stopping once
+    # verify_count of them survive or after 2 * verify_count attempts.
+    screened.sort(key=lambda x: x[0])
+    move_candidates = []
+    refuted = set()
+    verify_left = verify_nodes * verify_count if verify_budget is None else verify_budget
+    for _, move in screened[:2 * verify_count]:
+        if len(move_candidates) >= verify_count:
+            break
+
+        board.push(move)
         try:
-            info = engine.analyse(temp, chess.engine.Limit(depth=max_mate_depth))
+            verify_key = ("verify", chess.polyglot.zobrist_hash(board), max_mate_depth)
+            verify_cacheable = _cacheable(board)
+            verified = _cache_get(verify_key) if verify_cacheable else None
+            if verified is None and verify_left >= MIN_NODES:
+                limit = chess.engine.Limit(depth=max_mate_depth, nodes=min(verify_nodes, verify_left))
+                info = await _analyse_with_early_exit(engine, board, limit, early_exit_depth, bot_color, game)
+                verify_left -= info.get("nodes", limit.nodes)
+                verified = _get_cp_and_mate_from_info(info, bot_color)
+                reached = info.get("depth", 0) >= min(early_exit_depth, max_mate_depth) or verified[1] is not None
+                if verified != (None, None) and verify_cacheable and reached:
+                    _cache_put(verify_key, verified)
         except Exception as e:
-            print(f"⚠️ Engine mate-depth failed for {move.uci()}: {e}")
+            logger.warning("⚠️ Engine mate-depth failed for %s: %s", move, e)
             continue
+        finally:
+            board.pop()
+
+        if verified is None:
+            logger.debug("⌛ Verification budget spent — %s nodes left.", verify_left)
+            break
 
-        cp_after, mate_after = _get_cp_and_mate_from_info(info, bot_color)
+        cp_after, mate_after = verified
 
         if mate_after is not None:
             if mate_after > 0:
-                print(f"🏆 Mate found for us with {move.uci()} in {mate_after}")
-                winning_mate_move = move
-                continue
-            else:
-                mate_losses += 1
-                print(f"⛔ Skipping {move.uci()} — mate in {abs(mate_after)}")
-                continue
+                logger.debug("🏆 Mate found for us with %s in %s", move, mate_after)
+                return move
+            mate_losses += 1
+            refuted.add(move)
+            logger.debug("⛔ Skipping %s — mate in %s", move, -mate_after)
+            continue
 
         if cp_after is None:
-            print(f"⚠️ Could not obtain CP for {move.uci()} — skipping")
+            logger.debug("⚠️ Could not obtain CP for %s — skipping", move)
             continue
 
         drop = cur_cp - cp_after
         if drop > cp_cap_one_move:
-            print(f"🚫 Skipping {move.uci()} — drop {drop} > {cp_cap_one_move}")
+            refuted.add(move)
+            logger.debug("🚫 Skipping %s — drop %s > %s", move, drop, cp_cap_one_move)
             continue
 
         move_candidates.append((cp_after, move))
-        print(f"🪓 Candidate {move.uci()} → cp_after={cp_after}, drop={drop}")
-
-    if winning_mate_move is not None:
-        return winning_mate_move
+        logger.debug("🪓 Candidate %s → cp_after=%s, drop=%s", move, cp_after, drop)
 
     if mate_losses / total > 0.25:
-        print(f"⚠️ {mate_losses}/{total} moves mate us — survival mode.")
-        try:
-            best_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth), multipv=1)
-            return best_info[0]["pv"][0]
-        except Exception:
-            return random.choice(legal_moves)
-
-    try:
-        pos_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth))
-        pos_cp, pos_mate = _get_cp_and_mate_from_info(pos_info, bot_color)
-        if pos_cp is not None and pos_cp < -1250:
-            print(f"🚨 Eval {pos_cp} < -1500 — survival mode.")
-            best_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth), multipv=1)
-            return best_info[0]["pv"][0]
-    except Exception:
-        pass
+        logger.debug("⚠️ %s/%s moves mate us — survival mode.", mate_losses, total)
+        return best_root_move or random.choice(legal_moves)
 
     if move_candidates:
         worst = min(move_candidates, key=lambda x: x[0])[1]
-        print(f"🤡 Worst survivable move: {worst.uci()}")
+        logger.debug("🤡 Worst survivable move: %s", worst)
         return worst
 
-    print("‼️ No survivable candidates — best fallback.")
-    try:
-        best_info = engine.analyse(board, chess.engine.Limit(depth=eval_depth), multipv=1)
-        return best_info[0]["pv"][0]
-    except Exception:
-        return random.choice(legal_moves)
+    # Nothing verified: trust the screen for the worst move phase 2 didn't refute.
+    unrefuted = [move for _, move in screened if move not in refuted]
+    if unrefuted:
+        logger.debug("🪓 Falling back to screened move: %s", unrefuted[0])
+        return unrefuted[0]
+
+    logger.debug("‼️ No survivable candidates — best fallback.")
+    return best_root_move or random.choice(legal_moves)
 
 
 # === GAME HANDLER ===
-def handle_game(game_id, my_color):
-    print(f"[{game_id}] Game handler started.")
-    board = chess.Board()
-    time.sleep(1)
-    game_stream = client.bots.stream_game_state(game_id)
-
-    for event in game_stream:
-        print(f"[{game_id}] Event: {event}")
-
-        if event['type'] in ['gameFull', 'gameState']:
-            state = event.get('state', event)
-            moves = state.get('moves', '')
-            print(f"[{game_id}] Moves: {moves}")
-            board = chess.Board()
-            for move in moves.split():
-                board.push_uci(move)
-
-            if board.turn == my_color and not board.is_game_over():
-                print(f"[{game_id}] Thinking...")
-                move = pick_worst_survivable_move(board.copy(), engine)
-                if move:
-                    print(f"[{game_id}] Playing: {move.uci()}")
-                    try:
-                        client.bots.make_move(game_id, move.uci())
-                    except Exception as e:
-                        print(f"[{game_id}] Move failed: {e}")
-                else:
-                    print(f"[{game_id}] No safe move.")
-            else:
-                print(f"[{game_id}] Not my turn or game over.")
+async def handle_game(game_id, my_color):
+    logger.info("[%s] Game handler started.", game_id)
+    _, engine = await chess.engine.popen_uci(STOCKFISH_PATH)
+    try:
+        await engine.configure({"Hash": ENGINE_HASH_MB, "Threads": ENGINE_THREADS})
+        nps = await _measure_nps(engine)
+        board = chess.Board()
+        await asyncio.sleep(1)
+        game_stream = client.bots.stream_game_state(game_id)
+
+        async with contextlib.aclosing(_latest_game_events(game_id, game_stream)) as events:
+            async for event in events:
+                logger.debug("[%s] Event: %s", game_id, event)
+
+                if event['type'] in ['gameFull', 'gameState']:
+                    state = event.get('state', event)
+                    # Lichess adjudicates repetition, 50-move, material and clock
+                    # endings and reports them here, so trust it over the board.
+                    status = state.get('status', 'started')
+                    if status not in ('created', 'started'):
+                        logger.info("[%s] Game over: %s", game_id, status)
+                        break
+                    moves = state.get('moves', '')
+                    logger.debug("[%s] Moves: %s", game_id, moves)
+                    board = chess.Board()
+                    for move in moves.split():
+                        board.push_uci(move)
+
+                    # Having a legal move rules out checkmate and stalemate.
+                    if board.turn == my_color and board.legal_moves:
+                        logger.debug("[%s] Thinking...", game_id)
+                        clock_ms = _clock_ms(state.get('wtime' if my_color == chess.WHITE else 'btime'))
+                        screen_nodes, verify_nodes, verify_budget = _node_budget(clock_ms, nps)
+                        move = await pick_worst_survivable_move(board, engine,
+                                                                screen_nodes=screen_nodes,
+                                                                verify_nodes=verify_nodes,
+                                                                verify_budget=verify_budget,
+                                                                game=game_id)
+                        if move:
+                            logger.info("[%s] Playing: %s", game_id, move)
+                            try:
+                                await _run_blocking(client.bots.make_move, game_id, move.uci())
+                            except Exception as e:
+                                logger.warning("[%s] Move failed: %s", game_id, e)
+                        else:
+                            logger.warning("[%s] No safe move.", game_id)
+                    else:
+                        logger.debug("[%s] Not my turn or game over.", game_id)
+    finally:
+        await engine.quit()
 
 
 # === MAIN LOOP ===
-def main():
-    print("WorstBot is online.")
-    for event in client.bots.stream_incoming_events():
-        print(f"Event: {event}")
+def _log_game_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("[%s] Game handler crashed.", task.get_name(), exc_info=task.exception())
+
 
-        if event['type'] == 'challenge':
-            print("Challenge received.")
+async def main():
+    logger.info("WorstBot is online.")
+    game_tasks = set()
+    try:
+        # Keep the incoming-events stream alive; if it fails or closes, the
+        # running games carry on while we reconnect.
+        while True:
+            try:
+                async for event in _iterate_blocking(client.bots.stream_incoming_events()):
+                    await _handle_incoming_event(event, game_tasks)
+                logger.warning("⚠️ Incoming event stream closed — reconnecting.")
+            except Exception as e:
+                logger.warning("⚠️ Incoming event stream failed: %s — reconnecting.", e)
+            await asyncio.sleep(RECONNECT_DELAY)
+    finally:
+        await asyncio.gather(*game_tasks, return_exceptions=True)
+
+
+async def _handle_incoming_event(event, game_tasks):
+    logger.debug("Event: %s", event)
+
+    if event['type'] == 'challenge':
+        logger.debug("Challenge received.")
+        challenge_id = event['challenge']['id']
+        try:
             if event['challenge']['variant']['key'] == 'standard' or event['challenge']['variant']['key']== 'fromPosition':
-                client.bots.accept_challenge(event['challenge']['id'])
-                print(f"Accepted challenge: {event['challenge']['id']}")
+                await _run_blocking(client.bots.accept_challenge, challenge_id)
+                logger.info("Accepted challenge: %s", challenge_id)
             else:
-                print("Declined non-standard challenge.")
-                client.bots.decline_challenge(event['challenge']['id'])
-
-        elif event['type'] == 'gameStart':
-            game_id = event['game']['id']
-            my_color_str = event['game']['color']
-            my_color = chess.WHITE if my_color_str == 'white' else chess.BLACK
-            print(f"Game started! ID: {game_id}, Color: {my_color_str.upper()}")
-            threading.Thread(target=handle_game, args=(game_id, my_color), daemon=True).start()
+                logger.info("Declined non-standard challenge.")
+                await _run_blocking(client.bots.decline_challenge, challenge_id)
+        except Exception as e:
+            logger.warning("Challenge %s reply failed: %s", challenge_id, e)
+
+    elif event['type'] == 'gameStart':
+        game_id = event['game']['id']
+        # Lichess repeats gameStart for ongoing games after a reconnect.
+        if any(task.get_name() == game_id for task in game_tasks):
+            logger.debug("[%s] Handler already running.", game_id)
+            return
+        my_color_str = event['game']['color']
+        my_color = chess.WHITE if my_color_str == 'white' else chess.BLACK
+        logger.info("Game started! ID: %s, Color: %s", game_id, my_color_str.upper())
+        task = asyncio.create_task(handle_game(game_id, my_color), name=game_id)
+        game_tasks.add(task)
+        task.add_done_callback(game_tasks.discard)
+        task.add_done_callback(_log_game_failure)
 
 
 # === FLASK KEEP-ALIVE SERVER ===
@@ -235,6 +467,8 @@ def home():
     return "✅ WorstBot is running on Render!"
 
 if __name__ == "__main__":
-    threading.Thread(target=main, daemon=True).start()
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                        format="%(asctime)s %(levelname)s %(message)s")
+    threading.Thread(target=asyncio.run, args=(main(),), daemon=True).start()
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port)